@@ -0,0 +1,348 @@
+'''
+Headless latency benchmarks for the user-facing Game operations.
+
+Every operation is timed over a fixed corpus of positions. Each benchmark runs in several rounds (interleaved with the
+other benchmarks), with the number of samples per round sized to a time budget. The report shows the min / median /
+p99 of all samples, and "best": the median over rounds of each round's fastest sample, which is the statistic the
+regression check uses since it is far less sensitive to noise from the rest of the machine.
+
+The peak memory of one run of each operation and the number of memory blocks it leaves allocated ("retained") are
+measured with tracemalloc. Temporary allocations freed during the operation don't count towards the retained blocks.
+
+Results are compared against a stored baseline; the run fails when an operation's best time or peak memory exceeds
+the baseline by more than the threshold and by more than a small absolute noise floor. Retained blocks are reported
+only. A baseline records the settings it was measured with, and is only compared against runs with the same settings.
+
+    python benchmark.py                    # run and compare against benchmark_baseline.json
+    python benchmark.py --save-baseline    # run and store the results as the new baseline
+'''
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+# run without opening a window; pieces load their images relative to the repository root
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+from game import Game
+from common import *
+
+## benchmark settings
+DEFAULT_ROUNDS = 7
+DEFAULT_TIME_BUDGET_MS = 300    # timed samples per benchmark, split evenly across the rounds
+MIN_SAMPLES_PER_ROUND = 3
+MAX_SAMPLES_PER_ROUND = 1000
+CALIBRATION_RUNS = 3
+DEFAULT_THRESHOLD = 0.25
+TIME_NOISE_FLOOR_NS = 5000      # ignore time differences smaller than this
+MEMORY_NOISE_FLOOR = 1024       # ignore peak memory differences smaller than this (bytes)
+DEFAULT_BASELINE_PATH = 'benchmark_baseline.json'
+
+## position corpus
+# squares are written in standard algebraic notation from white's point of view; each position lists the moves
+# played from the starting position, then the moves to benchmark from there (any of them may be omitted). 'mate'
+# names the move that checkmates ('setup' for the last setup move); those positions are checked to really be mate,
+# so they exercise the full checkmate search
+POSITIONS = [
+    {
+        'name': 'opening',
+        'setup': [],
+        'quiet': ('e2', 'e4'),
+    },
+    {
+        'name': 'middlegame',
+        'setup': [('e2', 'e4'), ('e7', 'e5'), ('g1', 'f3'), ('b8', 'c6'), ('f1', 'c4'), ('f8', 'c5'),
+                  ('c2', 'c3'), ('g8', 'f6'), ('d2', 'd3'), ('d7', 'd6'), ('b1', 'd2'), ('a7', 'a6'),
+                  ('h2', 'h3'), ('h7', 'h6'), ('a2', 'a4'), ('c5', 'a7')],
+        'quiet': ('d1', 'e2'),
+        'capture': ('f3', 'e5'),
+    },
+    {
+        'name': 'en passant',
+        'setup': [('e2', 'e4'), ('a7', 'a6'), ('e4', 'e5'), ('d7', 'd5')],
+        'quiet': ('g1', 'f3'),
+        'enPassant': ('e5', 'd6'),
+    },
+    {
+        'name': 'near mate (scholar)',
+        'setup': [('e2', 'e4'), ('e7', 'e5'), ('f1', 'c4'), ('b8', 'c6'), ('d1', 'h5'), ('g8', 'f6')],
+        'capture': ('h5', 'f7'),
+        'mate': 'capture',
+    },
+    {
+        'name': 'near mate (knight)',
+        'setup': [('f2', 'f4'), ('e7', 'e6'), ('b1', 'a3'), ('f7', 'f6'), ('e2', 'e3'), ('g7', 'g6'),
+                  ('d1', 'f3'), ('c7', 'c6'), ('a3', 'b5'), ('g8', 'e7')],
+        'quiet': ('b5', 'd6'),
+        'mate': 'quiet',
+    },
+    {
+        'name': 'checkmate (scholar)',
+        'setup': [('e2', 'e4'), ('e7', 'e5'), ('f1', 'c4'), ('b8', 'c6'), ('d1', 'h5'), ('g8', 'f6'),
+                  ('h5', 'f7')],
+        'mate': 'setup',
+    },
+]
+
+
+def squareToBoardTile(square):
+    # white's king starts on column 3 and its queen on column 4, so files run from column 7 (a) to column 0 (h)
+    column = 7 - (ord(square[0]) - ord('a'))
+    row = int(square[1]) - 1
+    return column, row
+
+def playMove(game, move):
+    startingTile = squareToBoardTile(move[0])
+    endingTile = squareToBoardTile(move[1])
+    ply = game.getHistory().getCurrentPly()
+    game.selectPiece(startingTile)
+    game.placePiece(endingTile)
+    if game.getHistory().getCurrentPly() != ply + 1:
+        raise ValueError(f"illegal benchmark move {move[0]}-{move[1]} at ply {ply}")
+
+def isLastMoveCheckmate(game):
+    # checkmate is evaluated from the point of view of the player who made the last move
+    game.isWhitesTurn = not game.isWhitesTurn
+    isCheckmate = game.isOpponentCheckmated()
+    game.isWhitesTurn = not game.isWhitesTurn
+    return isCheckmate
+
+def verifyCheckmate(game, position):
+    mateMove = position.get('mate')
+    if mateMove is None:
+        return
+    positionPly = game.getHistory().getCurrentPly()
+    if mateMove != 'setup':
+        playMove(game, position[mateMove])
+    isCheckmate = isLastMoveCheckmate(game)
+    game.jumpToPly(positionPly)
+    setTurnNumber(positionPly)
+    if not isCheckmate:
+        raise ValueError(f"benchmark position '{position['name']}' isn't checkmate for the engine, so it doesn't exercise the full checkmate search")
+
+def createPosition(position):
+    game = Game()
+    setTurnNumber(0)
+    for move in position['setup']:
+        playMove(game, move)
+    verifyCheckmate(game, position)
+    return game
+
+
+class Benchmark:
+
+    def __init__(self, name, operation, setUp=None, tearDown=None):
+        self.name = name
+        self.operation = operation
+        self.setUp = setUp
+        self.tearDown = tearDown
+        self.samplesPerRound = MIN_SAMPLES_PER_ROUND
+        self.timings = []
+        self.roundMinimums = []
+
+    def runOnce(self):
+        if self.setUp is not None:
+            self.setUp()
+        start = time.perf_counter_ns()
+        self.operation()
+        elapsed = time.perf_counter_ns() - start
+        if self.tearDown is not None:
+            self.tearDown()
+        return elapsed
+
+    def calibrate(self, timeBudgetNs, rounds):
+        # the first runs also warm up caches before timing
+        runTime = max(1, min(self.runOnce() for _ in range(CALIBRATION_RUNS)))
+        samplesPerRound = timeBudgetNs // (rounds * runTime)
+        self.samplesPerRound = max(MIN_SAMPLES_PER_ROUND, min(MAX_SAMPLES_PER_ROUND, samplesPerRound))
+
+    def runRound(self):
+        timings = [self.runOnce() for _ in range(self.samplesPerRound)]
+        self.timings.extend(timings)
+        self.roundMinimums.append(min(timings))
+
+    def measureAllocations(self):
+        if self.setUp is not None:
+            self.setUp()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        startingMemory = tracemalloc.get_traced_memory()[0]
+        self.operation()
+        peakMemory = tracemalloc.get_traced_memory()[1] - startingMemory
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        if self.tearDown is not None:
+            self.tearDown()
+        # blocks still allocated after the operation (temporary allocations have been freed by then)
+        retainedBlocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+        return peakMemory, retainedBlocks
+
+    def getResult(self):
+        timings = sorted(self.timings)
+        peakMemory, retainedBlocks = self.measureAllocations()
+        return {
+            'samplesPerRound': self.samplesPerRound,
+            'best': statistics.median(self.roundMinimums),
+            'min': timings[0],
+            'median': statistics.median(timings),
+            'p99': timings[math.ceil(len(timings) * 0.99) - 1],
+            'peakMemory': peakMemory,
+            'retainedBlocks': retainedBlocks,
+        }
+
+
+def createMoveBenchmark(game, label, move):
+    startingTile = squareToBoardTile(move[0])
+    endingTile = squareToBoardTile(move[1])
+    positionPly = game.getHistory().getCurrentPly()
+    def setUp():
+        # the turn number is shared by every game, so bring it back in line with this one (en passant relies on it)
+        setTurnNumber(positionPly)
+        game.selectPiece(startingTile)
+    def tearDown():
+        # return to the benchmarked position (an illegal move leaves the position untouched)
+        game.jumpToPly(positionPly)
+    return Benchmark(label, lambda: game.placePiece(endingTile), setUp, tearDown)
+
+def createPositionBenchmarks(position):
+    game = createPosition(position)
+    name = position['name']
+    benchmarks = []
+
+    # selecting the piece for the position's first benchmarked move
+    firstMove = position.get('quiet') or position.get('capture') or position.get('enPassant')
+    if firstMove is not None:
+        selectTile = squareToBoardTile(firstMove[0])
+        benchmarks.append(Benchmark(f'{name}: selectPiece', lambda: game.selectPiece(selectTile), None, game.cancelMove))
+
+    for moveType in ('quiet', 'capture', 'enPassant'):
+        if moveType in position:
+            benchmarks.append(createMoveBenchmark(game, f'{name}: placePiece ({moveType})', position[moveType]))
+
+    benchmarks.append(Benchmark(f'{name}: isPlayerInCheck', lambda: game.isPlayerInCheck(game.isWhitesTurn)))
+
+    benchmarks.append(Benchmark(f'{name}: isOpponentCheckmated', lambda: isLastMoveCheckmate(game)))
+    return benchmarks
+
+def createBenchmarks():
+    benchmarks = [Benchmark('Game()', Game)]
+    for position in POSITIONS:
+        benchmarks.extend(createPositionBenchmarks(position))
+    return benchmarks
+
+
+def runBenchmarks(benchmarks, settings, samplesPerRound):
+    # sample counts come from the baseline when comparing against one, so both runs take the same number of samples
+    for benchmark in benchmarks:
+        if benchmark.name in samplesPerRound:
+            benchmark.samplesPerRound = samplesPerRound[benchmark.name]
+            benchmark.runOnce()
+        else:
+            benchmark.calibrate(settings['timeBudgetMs'] * 1000000, settings['rounds'])
+    # interleave the rounds, so a burst of load on the machine doesn't land on a single benchmark
+    for _ in range(settings['rounds']):
+        for benchmark in benchmarks:
+            benchmark.runRound()
+    return {benchmark.name: benchmark.getResult() for benchmark in benchmarks}
+
+
+def formatTime(nanoseconds):
+    return f'{nanoseconds / 1000:10.1f}us'
+
+def printResults(results):
+    nameWidth = max(len(name) for name in results)
+    print(f"{'benchmark':<{nameWidth}}  {'samples':>7}  {'best':>12}  {'min':>12}  {'median':>12}  {'p99':>12}  {'peak KiB':>9}  {'retained':>8}")
+    for name, result in results.items():
+        print(f"{name:<{nameWidth}}  {result['samplesPerRound']:7d}  {formatTime(result['best'])}  {formatTime(result['min'])}"
+              f"  {formatTime(result['median'])}  {formatTime(result['p99'])}  {result['peakMemory'] / 1024:9.1f}  {result['retainedBlocks']:8d}")
+
+def findRegressions(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric, noiseFloor in (('best', TIME_NOISE_FLOOR_NS), ('peakMemory', MEMORY_NOISE_FLOOR)):
+            allowed = baseline[name][metric] + max(baseline[name][metric] * threshold, noiseFloor)
+            if result[metric] > allowed:
+                regressions.append(f"{name}: {metric} {result[metric]:.0f} exceeds baseline {baseline[name][metric]:.0f} by more than {threshold:.0%}")
+    return regressions
+
+def loadBaseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as baselineFile:
+        baseline = json.load(baselineFile)
+    if 'settings' not in baseline or 'results' not in baseline:
+        raise ValueError(f"{path} was saved by an older version of this benchmark; run with --save-baseline to replace it")
+    return baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the latency of Game operations.')
+    parser.add_argument('--rounds', type=int, help=f'rounds of samples per benchmark (default {DEFAULT_ROUNDS}, or the baseline\'s)')
+    parser.add_argument('--time-budget', type=int, help=f'milliseconds of samples per benchmark (default {DEFAULT_TIME_BUDGET_MS}, or the baseline\'s)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='allowed regression over the baseline (0.25 = 25%%)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='baseline file to compare against or save to')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    args = parser.parse_args()
+
+    requestedSettings = {'rounds': args.rounds, 'timeBudgetMs': args.time_budget}
+    baseline = None
+    if not args.save_baseline:
+        try:
+            baseline = loadBaseline(args.baseline)
+        except ValueError as error:
+            print(error)
+            return 2
+
+    # measure with the baseline's settings, and refuse to compare runs with different settings
+    if baseline is not None:
+        settings = baseline['settings']
+        mismatches = [key for key, value in requestedSettings.items() if value is not None and value != settings.get(key)]
+        if mismatches:
+            for key in mismatches:
+                print(f"{key} {requestedSettings[key]} doesn't match the baseline's {settings.get(key)}; results wouldn't be comparable")
+            print(f"run with the baseline's settings or re-save {args.baseline} with --save-baseline")
+            return 2
+        samplesPerRound = {name: result['samplesPerRound'] for name, result in baseline['results'].items()}
+    else:
+        settings = {
+            'rounds': DEFAULT_ROUNDS if args.rounds is None else args.rounds,
+            'timeBudgetMs': DEFAULT_TIME_BUDGET_MS if args.time_budget is None else args.time_budget,
+        }
+        samplesPerRound = {}
+
+    # the game reports checks and wins on stdout; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = runBenchmarks(createBenchmarks(), settings, samplesPerRound)
+    printResults(results)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baselineFile:
+            json.dump({'settings': settings, 'results': results}, baselineFile, indent=4)
+        print(f"\nsaved baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nno baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    regressions = findRegressions(results, baseline['results'], args.threshold)
+    if regressions:
+        print('\nregressions:')
+        for regression in regressions:
+            print(f'  {regression}')
+        return 1
+    print(f"\nno regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,11 @@ class Board:
         # create 2D board array
         self.board = [[None for _ in range(TILE_COUNT)] for _ in range(TILE_COUNT)]
 
+    def clear(self):
+        for row in self.board:
+            for col in range(TILE_COUNT):
+                row[col] = None
+
     def getPieceAtTile(self, tile):
         return self.board[tile[ROW_INDEX]][tile[COL_INDEX]]
 
@@ -15,6 +20,9 @@ class Board:
     def addPieceAtTile(self, piece, tile):
         self.board[tile[ROW_INDEX]][tile[COL_INDEX]] = piece
 
+    def removePieceAtTile(self, tile):
+        self.board[tile[ROW_INDEX]][tile[COL_INDEX]] = None
+
     def movePieceToTile(self, piece, startingTile, endingTile):
         self.board[startingTile[ROW_INDEX]][startingTile[COL_INDEX]] = None
         self.board[endingTile[ROW_INDEX]][endingTile[COL_INDEX]] = piece
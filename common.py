@@ -15,18 +15,53 @@ DARK_TILE_COLOUR = DARK_BROWN
 TILE_COUNT = 8
 WINDOW_WIDTH = 640
 TILE_WIDTH = WINDOW_WIDTH // TILE_COUNT
-BORDER_WIDTH = TILE_WIDTH // 10 * 2
-PIECE_WIDTH = TILE_WIDTH - (2 * BORDER_WIDTH)
+
+## window & scale
+MIN_WINDOW_WIDTH = 160
+DESKTOP_FRACTION = 0.8          # portion of the (smaller) desktop dimension the window starts at
+RESIZE_SETTLE_MS = 100          # wait for the window to stop resizing before rescaling surfaces
+SCALE_CACHE_SIZE = 4            # number of piece scales kept in the image cache
+tileWidth = TILE_WIDTH
+boardOffset = (0, 0)            # top-left corner of the board within the window
 
 ## turn & time
 turnNumber = 0
 
+## move history
+HISTORY_SNAPSHOT_INTERVAL = 16
+HISTORY_JUMP_PLIES = 10
+
+## scale functions
+def setWindowSize(windowWidth, windowHeight):
+    global tileWidth, boardOffset
+    # largest board that fits the window, centred
+    tileWidth = max(MIN_WINDOW_WIDTH, min(windowWidth, windowHeight)) // TILE_COUNT
+    boardWidth = tileWidth * TILE_COUNT
+    boardOffset = (max(0, (windowWidth - boardWidth) // 2), max(0, (windowHeight - boardWidth) // 2))
+
+def getTileWidth():
+    return tileWidth
+
+def getBorderWidth():
+    return tileWidth // 10 * 2
+
+def getPieceWidth():
+    return tileWidth - (2 * getBorderWidth())
+
+def getBoardOffset():
+    return boardOffset
+
 ## tile functions
 def cordsToTile(x, y):
-    row = y // TILE_WIDTH
-    col = x // TILE_WIDTH
+    row = (y - boardOffset[ROW_INDEX]) // tileWidth
+    col = (x - boardOffset[COL_INDEX]) // tileWidth
     return col, row
 
+def tileToCords(tile):
+    x = tile[COL_INDEX] * tileWidth + boardOffset[COL_INDEX]
+    y = tile[ROW_INDEX] * tileWidth + boardOffset[ROW_INDEX]
+    return x, y
+
 def isTileInRange(tile):
     if tile is None:
         return False
@@ -46,3 +81,7 @@ def getTurnNumber():
     global turnNumber
     return turnNumber
 
+def setTurnNumber(newTurnNumber):
+    global turnNumber
+    turnNumber = newTurnNumber
+
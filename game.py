@@ -3,6 +3,7 @@ from typing import Optional, cast
 
 from piece import Piece, Pawn, Rook, Knight, Bishop, King, Queen
 from board import Board
+from history import *
 from common import *
 
 class Game:
@@ -15,6 +16,9 @@ class Game:
         self.activePieces = pygame.sprite.Group()
         self.createStandardPieces()
 
+        # every piece in the game, in a fixed order (used to encode piece states for the move history)
+        self.pieces = list(self.activePieces)
+
         # create captured game pieces
         self.capturedPieces = pygame.sprite.Group()
 
@@ -24,6 +28,9 @@ class Game:
         # one player (colour) can move at a time, starting with white
         self.isWhitesTurn = True
 
+        # record of every move played, for undo / redo and jumping to past positions
+        self.history = MoveHistory(self.encodePieceStates())
+
     def createStandardPieces(self):
         self.createStandardPawns(True)
         self.createStandardSpecialPieces(True)
@@ -57,6 +64,9 @@ class Game:
     def getBoard(self):
         return self.board
 
+    def getHistory(self):
+        return self.history
+
     def selectPiece(self, tile):
         if self.selectedPiece is not None:
             return False
@@ -82,6 +92,8 @@ class Game:
             return
 
         successfulMove = False
+        startingTile = self.selectedPiece.getPosition()
+        moveFlags = 0
 
         # destination tile is empty
         if not self.board.isTileOccupied(newTile):
@@ -97,8 +109,9 @@ class Game:
                     victimPawn = cast(Pawn, self.board.getPieceAtTile(enPassantVictimTile))
                     # did the victim pawn enter En Passant risk last turn?
                     if victimPawn.isOpenToEnPassant():
-                        self.movePiece(newTile, self.board.getPieceAtTile(enPassantVictimTile))
-                        successfulMove = True
+                        if self.movePiece(newTile, self.board.getPieceAtTile(enPassantVictimTile)):
+                            successfulMove = True
+                            moveFlags = MOVE_FLAG_CAPTURE | MOVE_FLAG_EN_PASSANT
 
             if not successfulMove and self.selectedPiece.isValidMove(newTile) and self.movePiece(newTile):
                 successfulMove = True
@@ -111,6 +124,7 @@ class Game:
         # destination tile has opponent piece
         elif self.selectedPiece.isValidAttack(newTile) and self.movePiece(newTile, self.board.getPieceAtTile(newTile)):
             successfulMove = True
+            moveFlags = MOVE_FLAG_CAPTURE
 
         if successfulMove:
             if self.isOpponentCheckmated():
@@ -120,12 +134,16 @@ class Game:
             self.whereIsOpposingPlayerInCheck()
             self.completeTurn()
             incrementTurnNumber()
+            self.history.recordMove(encodeMove(startingTile, newTile, moveFlags), self.encodePieceStates())
         else:
             self.cancelMove()
 
     def capturePiece(self, capturedPiece):
         if capturedPiece in self.activePieces:
             self.activePieces.remove(capturedPiece)
+        # clear the captured piece's tile (en passant victims aren't on the capturing piece's destination tile)
+        if self.board.getPieceAtTile(capturedPiece.getPosition()) is capturedPiece:
+            self.board.removePieceAtTile(capturedPiece.getPosition())
         if capturedPiece not in self.capturedPieces:
             self.capturedPieces.add(capturedPiece)
 
@@ -135,7 +153,7 @@ class Game:
         if capturedPiece not in self.activePieces:
             self.activePieces.add(capturedPiece)
             position = capturedPiece.getPosition() if newTile is None else newTile
-            capturedPiece.move(position)
+            capturedPiece.undoMove(position, capturedPiece.firstMoveMade)
 
     def movePiece(self, newTile, existingPiece=None):
         if self.selectedPiece is None:
@@ -148,15 +166,17 @@ class Game:
             self.capturePiece(pieceToBeCaptured)
         # record original piece position
         startingPosition = self.selectedPiece.getPosition()
+        firstMoveMade = self.selectedPiece.firstMoveMade
+        enPassantRiskTurn = self.getEnPassantRiskTurn(self.selectedPiece)
         # move piece
         self.selectedPiece.move(newTile)
         # can't make a move that results in check
         if self.isPlayerInCheck(self.isWhitesTurn):
+            # place selected piece back to its original position (before restoring the captured piece on its tile)
+            self.undoPieceMove(self.selectedPiece, startingPosition, firstMoveMade, enPassantRiskTurn)
             # restore capture piece
             if pieceToBeCaptured is not None:
                 self.restorePiece(pieceToBeCaptured)
-            # place selected piece back to its original position
-            self.selectedPiece.move(startingPosition)
             return False
         # successfully moved the piece
         return True
@@ -170,18 +190,31 @@ class Game:
             self.capturePiece(existingPiece)
         # record original piece position
         startingPosition = piece.getPosition()
+        firstMoveMade = piece.firstMoveMade
+        enPassantRiskTurn = self.getEnPassantRiskTurn(piece)
         # move piece
         piece.move(newTile)
         # evaluate if this player is still in check after the move
         escapedCheck = not self.isPlayerInCheck(piece.getIsWhite())
+        # place selected piece back to its original position (before restoring the captured piece on its tile)
+        self.undoPieceMove(piece, startingPosition, firstMoveMade, enPassantRiskTurn)
         # restore capture piece
         if existingPiece is not None:
             self.restorePiece(existingPiece)
-        # place selected piece back to its original position
-        piece.move(startingPosition)
         # successfully moved the piece
         return escapedCheck
 
+    def getEnPassantRiskTurn(self, piece):
+        if piece.getCharacterName() != 'pawn':
+            return None
+        return cast(Pawn, piece).getEnPassantRiskTurn()
+
+    def undoPieceMove(self, piece, tile, firstMoveMade, enPassantRiskTurn):
+        if piece.getCharacterName() == 'pawn':
+            cast(Pawn, piece).undoMove(tile, firstMoveMade, enPassantRiskTurn)
+        else:
+            piece.undoMove(tile, firstMoveMade)
+
     def cancelMove(self):
         self.selectedPiece.goBackToPosition()
         self.selectedPiece = None
@@ -230,3 +263,68 @@ class Game:
                     return False
         return True
 
+    def encodePieceStates(self):
+        states = bytearray(len(self.pieces))
+        for pieceIndex, piece in enumerate(self.pieces):
+            if piece not in self.activePieces:
+                states[pieceIndex] = PIECE_CAPTURED
+                continue
+            states[pieceIndex] = tileToSquare(piece.getPosition())
+            if piece.firstMoveMade:
+                states[pieceIndex] |= PIECE_FIRST_MOVE_MADE
+        return states
+
+    def restorePieceStates(self, states, ply):
+        self.board.clear()
+        # only the pawn that double-stepped on the previous ply can be captured via en passant
+        enPassantSquare = None
+        lastMove = self.history.getMoveBefore(ply)
+        if lastMove is not None and abs(lastMove[1] - lastMove[0]) == 2 * TILE_COUNT:
+            enPassantSquare = lastMove[1]
+        for piece, pieceState in zip(self.pieces, states):
+            if pieceState & PIECE_CAPTURED:
+                self.capturePiece(piece)
+                continue
+            if piece not in self.activePieces:
+                self.capturedPieces.remove(piece)
+                self.activePieces.add(piece)
+            square = pieceState & PIECE_SQUARE_MASK
+            firstMoveMade = bool(pieceState & PIECE_FIRST_MOVE_MADE)
+            if piece.getCharacterName() == 'pawn':
+                enPassantRiskTurn = ply - 1 if square == enPassantSquare else 0
+                cast(Pawn, piece).restoreState(squareToTile(square), firstMoveMade, enPassantRiskTurn)
+            else:
+                piece.restoreState(squareToTile(square), firstMoveMade)
+        for piece in self.activePieces:
+            piece.calculateNewValidMoves()
+
+    '''
+    Show the position after the given ply; the next move played from there replaces any later moves
+    '''
+    def jumpToPly(self, ply):
+        if self.selectedPiece is not None:
+            self.cancelMove()
+        ply = max(0, min(ply, self.history.getLastPly()))
+        if ply == self.history.getCurrentPly():
+            return False
+        states = self.history.jumpToPly(ply)
+        if states is None:
+            return False
+        self.restorePieceStates(states, ply)
+        self.isWhitesTurn = ply % 2 == 0
+        setTurnNumber(ply)
+        return True
+
+    def undo(self):
+        return self.jumpToPly(self.history.getCurrentPly() - 1)
+
+    def redo(self):
+        return self.jumpToPly(self.history.getCurrentPly() + 1)
+
+    def resize(self, windowWidth, windowHeight):
+        if self.selectedPiece is not None:
+            self.cancelMove()
+        setWindowSize(windowWidth, windowHeight)
+        # captured pieces are rescaled too, so they are ready if they return to the board
+        for piece in self.pieces:
+            piece.rescale()
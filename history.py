@@ -0,0 +1,121 @@
+from array import array
+
+from common import *
+
+## move encoding (16 bits per move)
+#   bits 0-5   : starting square (row * TILE_COUNT + col)
+#   bits 6-11  : ending square
+#   bits 12-15 : move flags
+MOVE_SQUARE_BITS = 6
+MOVE_SQUARE_MASK = (1 << MOVE_SQUARE_BITS) - 1
+MOVE_FLAGS_SHIFT = 2 * MOVE_SQUARE_BITS
+MOVE_FLAG_CAPTURE = 0x1
+MOVE_FLAG_EN_PASSANT = 0x2
+
+## piece state encoding (1 byte per piece in a snapshot)
+#   bits 0-5 : square the piece occupies
+#   bit 6    : piece has made its first move
+#   bit 7    : piece has been captured (a captured piece is stored as PIECE_CAPTURED alone)
+PIECE_SQUARE_MASK = MOVE_SQUARE_MASK
+PIECE_FIRST_MOVE_MADE = 0x40
+PIECE_CAPTURED = 0x80
+
+
+def tileToSquare(tile):
+    return tile[ROW_INDEX] * TILE_COUNT + tile[COL_INDEX]
+
+def squareToTile(square):
+    return square % TILE_COUNT, square // TILE_COUNT
+
+def encodeMove(startingTile, endingTile, flags=0):
+    return tileToSquare(startingTile) | (tileToSquare(endingTile) << MOVE_SQUARE_BITS) | (flags << MOVE_FLAGS_SHIFT)
+
+def decodeMove(move):
+    startingSquare = move & MOVE_SQUARE_MASK
+    endingSquare = (move >> MOVE_SQUARE_BITS) & MOVE_SQUARE_MASK
+    flags = move >> MOVE_FLAGS_SHIFT
+    return startingSquare, endingSquare, flags
+
+
+class MoveHistory:
+    '''
+    Compact record of every ply played in a game.
+
+    Moves are packed into an array of 16-bit integers, and a snapshot of every piece's state (1 byte per piece) is
+    kept every HISTORY_SNAPSHOT_INTERVAL plies. Any ply can be rebuilt from its nearest snapshot by replaying at most
+    HISTORY_SNAPSHOT_INTERVAL - 1 moves, so jumping around the history takes the same time regardless of game length.
+    '''
+
+    def __init__(self, initialState):
+        # every move played so far (including undone moves that can still be redone)
+        self.moves = array('H')
+        # piece states at plies 0, HISTORY_SNAPSHOT_INTERVAL, 2 * HISTORY_SNAPSHOT_INTERVAL, ...
+        self.snapshots = [bytes(initialState)]
+        # the ply currently shown on the board
+        self.currentPly = 0
+
+    def getCurrentPly(self):
+        return self.currentPly
+
+    def getLastPly(self):
+        return len(self.moves)
+
+    def canUndo(self):
+        return self.currentPly > 0
+
+    def canRedo(self):
+        return self.currentPly < self.getLastPly()
+
+    def getMoveBefore(self, ply):
+        if ply <= 0 or ply > self.getLastPly():
+            return None
+        return decodeMove(self.moves[ply - 1])
+
+    def recordMove(self, move, resultingState):
+        # playing a move from an earlier ply discards the moves that were undone
+        if self.canRedo():
+            del self.moves[self.currentPly:]
+            del self.snapshots[self.currentPly // HISTORY_SNAPSHOT_INTERVAL + 1:]
+        self.moves.append(move)
+        self.currentPly += 1
+        if self.currentPly % HISTORY_SNAPSHOT_INTERVAL == 0:
+            self.snapshots.append(bytes(resultingState))
+
+    def getStateAtPly(self, ply):
+        if ply < 0 or ply > self.getLastPly():
+            return None
+        snapshotIndex = ply // HISTORY_SNAPSHOT_INTERVAL
+        state = bytearray(self.snapshots[snapshotIndex])
+        snapshotPly = snapshotIndex * HISTORY_SNAPSHOT_INTERVAL
+        if snapshotPly == ply:
+            return state
+
+        # map each occupied square to the piece standing on it
+        pieceAtSquare = [None] * (TILE_COUNT * TILE_COUNT)
+        for pieceIndex, pieceState in enumerate(state):
+            if not pieceState & PIECE_CAPTURED:
+                pieceAtSquare[pieceState & PIECE_SQUARE_MASK] = pieceIndex
+
+        # replay the moves made since the snapshot
+        for move in self.moves[snapshotPly:ply]:
+            startingSquare, endingSquare, flags = decodeMove(move)
+            if flags & MOVE_FLAG_CAPTURE:
+                victimSquare = endingSquare
+                if flags & MOVE_FLAG_EN_PASSANT:
+                    # the victim pawn sits beside the starting square, in the ending square's column
+                    victimSquare = startingSquare - (startingSquare % TILE_COUNT) + (endingSquare % TILE_COUNT)
+                victimIndex = pieceAtSquare[victimSquare]
+                if victimIndex is not None:
+                    state[victimIndex] = PIECE_CAPTURED
+                    pieceAtSquare[victimSquare] = None
+            pieceIndex = pieceAtSquare[startingSquare]
+            pieceAtSquare[startingSquare] = None
+            pieceAtSquare[endingSquare] = pieceIndex
+            state[pieceIndex] = endingSquare | PIECE_FIRST_MOVE_MADE
+        return state
+
+    def jumpToPly(self, ply):
+        state = self.getStateAtPly(ply)
+        if state is not None:
+            self.currentPly = ply
+        return state
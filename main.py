@@ -1,18 +1,31 @@
+import os
 import pygame
 
 from game import Game
+from render import getBoardSurface
 from common import *
 
 ### Game Setup & Init
+
+# render at the display's native resolution on high-DPI Windows displays (instead of being upscaled by the OS)
+os.environ.setdefault('SDL_WINDOWS_DPI_AWARENESS', 'permonitorv2')
 pygame.init()
 
-# define screen
-size = (WINDOW_WIDTH, WINDOW_WIDTH)
-screen = pygame.display.set_mode(size)
+# define screen (resizable, starting at a portion of the desktop so the board suits any display)
+displayInfo = pygame.display.Info()
+windowWidth = WINDOW_WIDTH
+if displayInfo.current_w > 0 and displayInfo.current_h > 0:
+    windowWidth = max(MIN_WINDOW_WIDTH, int(min(displayInfo.current_w, displayInfo.current_h) * DESKTOP_FRACTION))
+size = (windowWidth, windowWidth)
+screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+setWindowSize(*size)
 
 # clock used to control how fast the game screen updates
 clock = pygame.time.Clock()
 
+# holding a key down repeats it, so the move history can be scrubbed through quickly
+pygame.key.set_repeat(300, 30)
+
 # game manager
 game = Game()
 
@@ -25,6 +38,9 @@ game = Game()
 
 mousePieceOffset = (0, 1)   # offset between the cursor and piece's top left corner
 
+pendingWindowSize = None    # latest size reported while the window is being resized
+lastResizeTime = 0
+
 carryOn = True
 while carryOn:
     ## event loop & game logic
@@ -34,6 +50,11 @@ while carryOn:
         if event.type == pygame.QUIT:
             carryOn = False
 
+        # window resized; rescale once the resizing settles rather than on every event
+        elif event.type == pygame.VIDEORESIZE:
+            pendingWindowSize = (event.w, event.h)
+            lastResizeTime = pygame.time.get_ticks()
+
         # pick up a piece (if one is present under the cursor)
         elif event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == LEFT_MOUSE_BUTTON:
@@ -54,14 +75,35 @@ while carryOn:
                 newPieceYCord = event.pos[1] - mousePieceOffset[1]
                 game.dragPiece((newPieceXCord, newPieceYCord))
 
-    # draw chessboard
-    for row in range(TILE_COUNT):
-        for col in range(TILE_COUNT):
-            square = pygame.Rect(col * TILE_WIDTH, row * TILE_WIDTH, TILE_WIDTH, TILE_WIDTH)
-            if (row + col) % 2 == 0:
-                pygame.draw.rect(screen, LIGHT_TILE_COLOUR, square)
-            else:
-                pygame.draw.rect(screen, DARK_TILE_COLOUR, square)
+        # scrub through the move history
+        elif event.type == pygame.KEYDOWN:
+            history = game.getHistory()
+            # undo (left arrow or ctrl+z)
+            if event.key == pygame.K_LEFT or (event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL):
+                game.undo()
+            # redo (right arrow or ctrl+y)
+            elif event.key == pygame.K_RIGHT or (event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL):
+                game.redo()
+            # jump several plies at a time
+            elif event.key == pygame.K_PAGEUP:
+                game.jumpToPly(history.getCurrentPly() - HISTORY_JUMP_PLIES)
+            elif event.key == pygame.K_PAGEDOWN:
+                game.jumpToPly(history.getCurrentPly() + HISTORY_JUMP_PLIES)
+            # jump to the start or end of the game
+            elif event.key == pygame.K_HOME:
+                game.jumpToPly(0)
+            elif event.key == pygame.K_END:
+                game.jumpToPly(history.getLastPly())
+
+    # rescale the board and pieces to the new window size
+    if pendingWindowSize is not None and pygame.time.get_ticks() - lastResizeTime >= RESIZE_SETTLE_MS:
+        game.resize(*pendingWindowSize)
+        screen = pygame.display.get_surface()
+        pendingWindowSize = None
+
+    # draw chessboard (pre-rendered once per size)
+    screen.fill(BLACK)
+    screen.blit(getBoardSurface(getTileWidth()), getBoardOffset())
 
     # draw active pieces
     game.getActivePieces().draw(screen)
@@ -1,9 +1,9 @@
 import pygame as game
 from typing import Optional
-import os
 
 from common import *
 from board import Board
+from render import getPieceImage
 
 class Piece(game.sprite.Sprite):
 
@@ -20,14 +20,11 @@ class Piece(game.sprite.Sprite):
         self.position = (0, 0) if (startingPosition is None) else startingPosition
 
         # piece size
-        self.width = PIECE_WIDTH
-        self.height = PIECE_WIDTH
+        self.width = getPieceWidth()
+        self.height = getPieceWidth()
 
-        # load the image
-        characterImagePath = os.path.join('images', f'{self.colour}_{self.character}.png')
-        characterImage = game.image.load(characterImagePath)
-        # scale the image
-        self.image = game.transform.scale(characterImage, (self.width, self.height))
+        # load the (scaled) image
+        self.image = getPieceImage(self.colour, self.character, self.width)
 
         # place the piece (and its image) at the starting position
         self.rect = self.image.get_rect()
@@ -84,8 +81,17 @@ class Piece(game.sprite.Sprite):
         return self.position == tile
 
     def snapToTile(self, tile):
-        self.rect.x = tile[COL_INDEX] * TILE_WIDTH + BORDER_WIDTH
-        self.rect.y = tile[ROW_INDEX] * TILE_WIDTH + BORDER_WIDTH
+        x, y = tileToCords(tile)
+        self.rect.x = x + getBorderWidth()
+        self.rect.y = y + getBorderWidth()
+
+    def rescale(self):
+        # called when the board is resized; images come from the scaled image cache
+        self.width = getPieceWidth()
+        self.height = getPieceWidth()
+        self.image = getPieceImage(self.colour, self.character, self.width)
+        self.rect.size = (self.width, self.height)
+        self.snapToTile(self.position)
 
     def updateTilePosition(self, tile):
         self.board.movePieceToTile(self, self.getPosition(), tile)
@@ -135,6 +141,18 @@ class Piece(game.sprite.Sprite):
         # move to new tile
         self.updateTilePosition(tile)
 
+    def undoMove(self, tile, firstMoveMade):
+        # step back to a previous tile without counting it as a move
+        self.updateTilePosition(tile)
+        self.firstMoveMade = firstMoveMade
+
+    def restoreState(self, tile, firstMoveMade):
+        # the board is rebuilt by the caller, so only claim the new tile
+        self.firstMoveMade = firstMoveMade
+        self.position = tile
+        self.snapToTile(tile)
+        self.board.addPieceAtTile(self, tile)
+
 
 class Pawn(Piece):
     def __init__(self, isWhite, board, number=1, startingPosition=None):
@@ -189,6 +207,19 @@ class Pawn(Piece):
             self.enPassantRiskTurn = 0
         super().move(tile)
 
+    def undoMove(self, tile, firstMoveMade, enPassantRiskTurn=None):
+        # moving also changes the en passant risk turn, so put that back too
+        if enPassantRiskTurn is not None:
+            self.enPassantRiskTurn = enPassantRiskTurn
+        super().undoMove(tile, firstMoveMade)
+
+    def getEnPassantRiskTurn(self):
+        return self.enPassantRiskTurn
+
+    def restoreState(self, tile, firstMoveMade, enPassantRiskTurn=0):
+        self.enPassantRiskTurn = enPassantRiskTurn
+        super().restoreState(tile, firstMoveMade)
+
     def getDirection(self):
         return self.direction
 
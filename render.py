@@ -0,0 +1,36 @@
+import functools
+import os
+
+import pygame
+
+from common import *
+
+# every colour / character combination can be cached at each of the kept scales
+PIECE_IMAGE_COUNT = 2 * 6
+
+
+@functools.lru_cache(maxsize=None)
+def loadPieceImage(colour, character):
+    return pygame.image.load(os.path.join('images', f'{colour}_{character}.png'))
+
+@functools.lru_cache(maxsize=PIECE_IMAGE_COUNT * SCALE_CACHE_SIZE)
+def getPieceImage(colour, character, width):
+    # scaled once per size; pieces of the same kind share the surface
+    return pygame.transform.smoothscale(loadPieceImage(colour, character), (width, width))
+
+@functools.lru_cache(maxsize=None)
+def getBoardPattern():
+    # the board at 1 pixel per tile
+    boardPattern = pygame.Surface((TILE_COUNT, TILE_COUNT))
+    for row in range(TILE_COUNT):
+        for col in range(TILE_COUNT):
+            if (row + col) % 2 == 0:
+                boardPattern.set_at((col, row), LIGHT_TILE_COLOUR)
+            else:
+                boardPattern.set_at((col, row), DARK_TILE_COLOUR)
+    return boardPattern
+
+@functools.lru_cache(maxsize=1)
+def getBoardSurface(tileWidth):
+    # only the current size is kept; a full-size board is large on high resolution displays
+    return pygame.transform.scale(getBoardPattern(), (tileWidth * TILE_COUNT, tileWidth * TILE_COUNT))